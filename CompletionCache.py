@@ -0,0 +1,180 @@
+"""
+Cisco Sample Code License 1.1
+Author: flopach 2024
+"""
+import hashlib
+import json
+import sqlite3
+import time
+import logging
+log = logging.getLogger("applogger")
+
+class CompletionCache:
+    def __init__(self, database_path="completion_cache.db", temperature=None):
+        """
+        Create new disk-backed cache for LLM completions
+
+        Args:
+            database_path (str): persistent storage (SQLite file) for the cached completions
+            temperature (float): Option to pin the temperature of cached requests:
+                                 default --> None (the LLM class uses its own temperature)
+                                 0 --> reproducible regeneration of the cached data
+        """
+        self.temperature = temperature
+        self.hits = 0
+        self.misses = 0
+
+        self.connection = sqlite3.connect(database_path, check_same_thread=False)
+        self.connection.execute(
+            """CREATE TABLE IF NOT EXISTS completions (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                tag TEXT,
+                completion TEXT NOT NULL,
+                created REAL NOT NULL
+            )"""
+        )
+        # inputs known before the vectorDB context query --> key of the full prompt
+        self.connection.execute(
+            """CREATE TABLE IF NOT EXISTS inputs (
+                inputs_key TEXT PRIMARY KEY,
+                key TEXT NOT NULL
+            )"""
+        )
+        self.connection.commit()
+
+    def _key(self, model, system_prompt, user_message, temperature):
+        """
+        Create the cache key: hash of model, system prompt, user message and temperature
+        """
+        payload = json.dumps([model, system_prompt, user_message, temperature])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _inputs_key(self, inputs, temperature):
+        """
+        Create the key of the request inputs which are known before the vectorDB context query
+        """
+        payload = json.dumps(list(inputs) + [temperature])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _save_inputs(self, inputs, temperature, key):
+        """
+        Link the request inputs to the key of the full prompt
+        """
+        self.connection.execute(
+            "INSERT OR REPLACE INTO inputs (inputs_key, key) VALUES (?, ?)",
+            (self._inputs_key(inputs, temperature), key)
+        )
+
+    def get_by_inputs(self, inputs, temperature):
+        """
+        Return the cached completion for the request inputs or None. Use it before the vectorDB context query:
+        a hit skips the context query (and its embedding request). A miss is not counted, use get() afterwards.
+
+        Args:
+            inputs (list): request inputs, e.g. [model, system prompt, path, operation, parameters, query string]
+            temperature (float): temperature sent to the LLM
+        """
+        row = self.connection.execute(
+            "SELECT c.completion FROM inputs i JOIN completions c ON c.key = i.key WHERE i.inputs_key = ?",
+            (self._inputs_key(inputs, temperature),)
+        ).fetchone()
+
+        if row is None:
+            return None
+
+        self.hits += 1
+        return row[0]
+
+    def get(self, model, system_prompt, user_message, temperature, inputs=None):
+        """
+        Return the cached completion or None if there is no entry
+
+        Args:
+            model (str): LLM model name
+            system_prompt (str): system prompt sent to the LLM
+            user_message (str): user message sent to the LLM
+            temperature (float): temperature sent to the LLM
+            inputs (list): optional request inputs, saved on a hit for get_by_inputs()
+        """
+        key = self._key(model, system_prompt, user_message, temperature)
+        row = self.connection.execute(
+            "SELECT completion FROM completions WHERE key = ?",
+            (key,)
+        ).fetchone()
+
+        if row is None:
+            self.misses += 1
+            return None
+
+        if inputs is not None:
+            self._save_inputs(inputs, temperature, key)
+            self.connection.commit()
+
+        self.hits += 1
+        return row[0]
+
+    def set(self, model, system_prompt, user_message, temperature, completion, tag=None, inputs=None):
+        """
+        Save a completion in the cache
+
+        Args:
+            model (str): LLM model name
+            system_prompt (str): system prompt sent to the LLM
+            user_message (str): user message sent to the LLM
+            temperature (float): temperature sent to the LLM
+            completion (str): completion returned by the LLM
+            tag (str): optional tag to group entries, e.g. "extend_api_description"
+            inputs (list): optional request inputs for get_by_inputs()
+        """
+        key = self._key(model, system_prompt, user_message, temperature)
+        self.connection.execute(
+            "INSERT OR REPLACE INTO completions (key, model, tag, completion, created) VALUES (?, ?, ?, ?, ?)",
+            (key, model, tag, completion, time.time())
+        )
+        if inputs is not None:
+            self._save_inputs(inputs, temperature, key)
+        self.connection.commit()
+
+    def invalidate(self, model=None, tag=None):
+        """
+        Delete cached completions. Without arguments, the whole cache is cleared.
+
+        Args:
+            model (str): only delete entries of this model
+            tag (str): only delete entries with this tag
+
+        Returns:
+            int: number of deleted entries
+        """
+        conditions = []
+        values = []
+        if model is not None:
+            conditions.append("model = ?")
+            values.append(model)
+        if tag is not None:
+            conditions.append("tag = ?")
+            values.append(tag)
+
+        query = "DELETE FROM completions"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+
+        deleted = self.connection.execute(query, values).rowcount
+        self.connection.execute("DELETE FROM inputs WHERE key NOT IN (SELECT key FROM completions)")
+        self.connection.commit()
+        log.info(f"Invalidated {deleted} cached completions (model={model}, tag={tag})")
+        return deleted
+
+    def stats(self):
+        """
+        Return hit/miss statistics of this cache instance
+        """
+        entries = self.connection.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+        requests = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / requests, 3) if requests else 0.0,
+            "entries": entries
+        }
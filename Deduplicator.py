@@ -0,0 +1,188 @@
+"""
+Cisco Sample Code License 1.1
+Author: flopach 2024
+"""
+import hashlib
+import math
+import random
+import re
+from collections import Counter
+import logging
+log = logging.getLogger("applogger")
+
+# Mersenne prime used for the MinHash permutations
+_PRIME = (1 << 61) - 1
+
+class ChunkDeduplicator:
+    def __init__(self, threshold=0.9, shingle_size=5, num_perm=64, bands=16):
+        """
+        Create new near-duplicate filter for text chunks (MinHash + LSH over word shingles)
+
+        Args:
+            threshold (float): estimated Jaccard similarity above which a chunk counts as duplicate
+            shingle_size (int): number of words per shingle
+            num_perm (int): number of MinHash permutations
+            bands (int): number of LSH bands, num_perm must be divisible by bands
+        """
+        if num_perm % bands != 0:
+            raise ValueError("num_perm must be divisible by bands")
+
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+
+        # fixed seed: the same chunk always gets the same signature
+        rng = random.Random(1)
+        self.permutations = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(num_perm)]
+
+        self.reset()
+
+    def reset(self):
+        """
+        Forget all chunks seen so far, e.g. before a new import
+        """
+        # LSH buckets + signatures of all chunks seen so far, separately for each group (doc_type)
+        self.indexes = {}
+        self.counts = {}
+
+    def _shingles(self, text):
+        """
+        Split the normalized text into overlapping word shingles
+        """
+        words = re.sub(r"\s+", " ", text.lower()).strip().split(" ")
+        if len(words) <= self.shingle_size:
+            return {" ".join(words)}
+        return {" ".join(words[i:i + self.shingle_size]) for i in range(len(words) - self.shingle_size + 1)}
+
+    def _signature(self, text):
+        """
+        Create the MinHash signature of a text
+        """
+        hashes = [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big") for s in self._shingles(text)]
+        return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in self.permutations)
+
+    def _similarity(self, sig_a, sig_b):
+        """
+        Estimate the Jaccard similarity of two signatures
+        """
+        return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / self.num_perm
+
+    def is_duplicate(self, text, group="default"):
+        """
+        Check if the text is a near-duplicate of an already seen chunk of the same group. If not, remember it.
+
+        Args:
+            text (str): text chunk
+            group (str): chunks are only compared within the same group, e.g. the doc_type
+        """
+        buckets, signatures = self.indexes.setdefault(group, ([{} for _ in range(self.bands)], []))
+        counts = self.counts.setdefault(group, {"seen": 0, "removed": 0})
+        counts["seen"] += 1
+
+        signature = self._signature(text)
+        band_keys = [signature[i * self.rows:(i + 1) * self.rows] for i in range(self.bands)]
+
+        # candidates share at least one band with the new chunk
+        candidates = set()
+        for band, key in zip(buckets, band_keys):
+            candidates.update(band.get(key, ()))
+
+        for candidate in candidates:
+            if self._similarity(signature, signatures[candidate]) >= self.threshold:
+                counts["removed"] += 1
+                return True
+
+        index = len(signatures)
+        signatures.append(signature)
+        for band, key in zip(buckets, band_keys):
+            band.setdefault(key, []).append(index)
+        return False
+
+    def filter(self, documents, ids, metadatas, exempt=None):
+        """
+        Remove near-duplicate chunks. Chunks are compared within their doc_type only.
+
+        Args:
+            documents (list): list of chunked documents
+            ids (list): list of IDs
+            metadatas (list): list of metadata
+            exempt (list): optional list of booleans, True = always keep this chunk
+
+        Returns:
+            tuple: (documents, ids, metadatas) without the duplicates
+        """
+        exempt = exempt or [False] * len(documents)
+        kept = [
+            i for i, document in enumerate(documents)
+            if exempt[i] or not self.is_duplicate(document, metadatas[i].get("doc_type", "default"))
+        ]
+        return [documents[i] for i in kept], [ids[i] for i in kept], [metadatas[i] for i in kept]
+
+    def stats(self):
+        """
+        Return how many chunks were checked and removed per doc_type
+        """
+        return {
+            group: {
+                "seen": counts["seen"],
+                "removed": counts["removed"],
+                "removed_ratio": round(counts["removed"] / counts["seen"], 3) if counts["seen"] else 0.0
+            }
+            for group, counts in self.counts.items()
+        }
+
+def _fingerprint(element):
+    """
+    Hash of the complete element subtree (markup + text)
+    """
+    return hashlib.blake2b(str(element).encode("utf-8"), digest_size=16).hexdigest()
+
+def _boilerplate_candidates(element, min_text_length):
+    """
+    Yield all element subtrees which could be boilerplate. Code samples are never candidates.
+    """
+    for child in element.find_all(True, recursive=False):
+        if child.name in ("pre", "code"):
+            continue
+        if len(child.get_text(strip=True)) < min_text_length:
+            continue
+        # elements containing code samples are kept, only their other children are checked
+        if child.find(["pre", "code"]) is None:
+            yield child
+        yield from _boilerplate_candidates(child, min_text_length)
+
+def strip_boilerplate(soups, min_page_ratio=0.9, min_text_length=50):
+    """
+    Remove DOM subtrees which are repeated on nearly all pages (navigation, header, footer)
+
+    Args:
+        soups (dict): page name --> parsed page (BeautifulSoup), changed in place
+        min_page_ratio (float): subtrees on at least this share of the pages are removed
+        min_text_length (int): shorter subtrees (e.g. headings like "Parameters") are kept
+
+    Returns:
+        dict: page name --> parsed page without the repeated subtrees
+    """
+    if len(soups) < 2:
+        return soups
+
+    # count on how many pages each subtree appears
+    subtree_count = Counter()
+    for soup in soups.values():
+        subtree_count.update({_fingerprint(e) for e in _boilerplate_candidates(soup, min_text_length)})
+
+    min_pages = max(2, math.ceil(len(soups) * min_page_ratio))
+    boilerplate = {fingerprint for fingerprint, count in subtree_count.items() if count >= min_pages}
+
+    before = sum(len(soup.get_text()) for soup in soups.values())
+    for soup in soups.values():
+        for element in list(_boilerplate_candidates(soup, min_text_length)):
+            # skip elements inside an already removed subtree
+            if not element.decomposed and _fingerprint(element) in boilerplate:
+                element.decompose()
+    after = sum(len(soup.get_text()) for soup in soups.values())
+    log.info(f"Removed {len(boilerplate)} repeated DOM subtrees ({before - after} of {before} characters) from {len(soups)} pages")
+
+    return soups
@@ -10,13 +10,15 @@ import requests
 import logging
 from PyPDF2 import PdfReader
 from TalkToDatabase import VectorDB
+from Deduplicator import strip_boilerplate
 
 log = logging.getLogger("applogger")
 
 class DataHandler:
-    def __init__(self, database, LLM):
+    def __init__(self, database, LLM, deduplicator=None):
         self.llm = LLM
         self.database = database
+        self.deduplicator = deduplicator
 
     def scrape_pdfuserguide_catcenter(self, filepath):
         """
@@ -38,6 +40,19 @@ class DataHandler:
                 # Log the number of chunks
                 log.info(f"Total number of chunks: {len(cleaned_chunks)}")
 
+                # Remove near-duplicate chunks before paying for their embeddings
+                cleaned_chunks, ids, metadatas = self._deduplicate(
+                    cleaned_chunks,
+                    [f"user_guide_{x}" for x in range(len(cleaned_chunks))],
+                    [{"doc_type": "userguide"} for _ in range(len(cleaned_chunks))]
+                )
+
+                # Chunks of a previous import are already in the vectorDB
+                cleaned_chunks, ids, metadatas = self._new_chunks(cleaned_chunks, ids, metadatas)
+                if not cleaned_chunks:
+                    log.info("=== User Guide is already in the VectorDB ===")
+                    return
+
                 # For testing purposes, only send 5 chunks to the LLM
                 #test_chunks = cleaned_chunks[:5]
                 
@@ -51,8 +66,8 @@ class DataHandler:
                 self.database.collection_add(
                     documents=cleaned_chunks,
                     embeddings=embeddings,
-                    ids=[f"user_guide_{x}" for x in range(len(cleaned_chunks))],
-                    metadatas=[{"doc_type": "userguide"} for _ in range(len(cleaned_chunks))]
+                    ids=ids,
+                    metadatas=metadatas
                 )
                 log.info("Successfully sent embedded data to VectorDB")
         except Exception as e:
@@ -88,24 +103,49 @@ class DataHandler:
             "topology"
         ]
         
+        # request all pages first: repeated navigation, header and footer subtrees are detected across pages
+        soups = {}
         for doc in docs_list:
             try:
                 r = requests.get(base_url+doc)
-                soup = BeautifulSoup(r.content, 'html.parser')
+                soups[doc] = BeautifulSoup(r.content, 'html.parser')
+
+                log.info(f"Scraped data from {base_url+doc}")
+
+            except Exception as e:
+                log.error(f"Error when requesting data from {base_url+doc}! Error: {e}")
+
+        if self.deduplicator is not None:
+            # remove DOM regions which never contain documentation
+            for soup in soups.values():
+                for tag in soup(["nav", "header", "footer", "script", "style", "noscript"]):
+                    tag.decompose()
+
+            soups = strip_boilerplate(soups)
+
+        for doc, soup in soups.items():
+            try:
                 chunks = self._chunk_text(soup.get_text(),512)
 
                 #log.info(chunks)
 
+                chunks, ids, metadatas = self._deduplicate(
+                    chunks,
+                    [f"{doc}_{x}" for x in range(len(chunks))],
+                    [{ "doc_type" : "apidocs" } for x in range(len(chunks))]
+                )
+                chunks, ids, metadatas = self._new_chunks(chunks, ids, metadatas)
+                if not chunks:
+                    continue
+
                 self.database.collection_add2(
                     documents=chunks,
-                    ids=[f"{doc}_{x}" for x in range(len(chunks))],
-                    metadatas=[{ "doc_type" : "apidocs" } for x in range(len(chunks))]
+                    ids=ids,
+                    metadatas=metadatas
                 )
 
-                log.info(f"Scraped data from {base_url+doc}")
-
             except Exception as e:
-                log.error(f"Error when requesting data from {base_url+doc}! Error: {e}")
+                log.error(f"Error when adding data from {base_url+doc}! Error: {e}")
         
         log.info(f"=== Done with api docs scraping ===")
 
@@ -138,6 +178,14 @@ class DataHandler:
                 #logging chunks
                 #log.debug(document_chunks)
 
+                # remove boilerplate chunks which are already in the vectorDB, the API query part is always kept
+                document_chunks, ids, metadatas = self._deduplicate(document_chunks, ids, metadatas, self._api_query_chunks(j_document,512))
+
+                # skip chunks of a previous import: they would be embedded again
+                document_chunks, ids, metadatas = self._new_chunks(document_chunks, ids, metadatas)
+                if not document_chunks:
+                    continue
+
                 # === put all information into vectorDB ===
 
                 # add into vectordb
@@ -231,14 +279,21 @@ class DataHandler:
                     #logging chunks
                     #log.debug(document_chunks)
 
+                    # remove boilerplate chunks which are already in the vectorDB, the API query part is always kept
+                    document_chunks, ids, metadatas = self._deduplicate(document_chunks, ids, metadatas, self._api_query_chunks(content,512))
+
+                    # skip chunks of a previous import: they would be embedded again
+                    document_chunks, ids, metadatas = self._new_chunks(document_chunks, ids, metadatas)
+
                     # === put all information into vectorDB ===
 
                     # add into vectordb
-                    self.database.collection_add2(
-                        documents=document_chunks,
-                        ids=ids,
-                        metadatas=metadatas
-                    )
+                    if document_chunks:
+                        self.database.collection_add2(
+                            documents=document_chunks,
+                            ids=ids,
+                            metadatas=metadatas
+                        )
 
                     # === put all information into a dict which will be saved later to JSON ===
 
@@ -253,8 +308,56 @@ class DataHandler:
         with open("data/extended_apispecs_documentation.json", "w") as f:
             json.dump(json_document, f)
 
+        # log how many descriptions were reused from the completion cache
+        cache = getattr(self.llm, "cache", None)
+        if cache is not None:
+            log.info(f"=== Completion cache statistics: {cache.stats()} ===")
+
+        # log the number of requests and average latency per routed model
+        router = getattr(self.llm, "router", None)
+        if router is not None:
+            log.info(f"=== Model routing statistics: {router.stats()} ===")
+
         log.info(f"=== Extended, chunked, embedded the openapi specification into the vectorDB ===")
     
+    def _deduplicate(self, documents, ids, metadatas, exempt=None):
+        """
+        Remove near-duplicate chunks with the deduplicator (if defined) and log how many were removed
+
+        Args:
+            documents (list): list of chunked documents
+            ids (list): list of IDs
+            metadatas (list): list of metadata
+            exempt (list): optional list of booleans, True = always keep this chunk
+        """
+        if self.deduplicator is None:
+            return documents, ids, metadatas
+
+        total = len(documents)
+        doc_type = metadatas[0]["doc_type"] if metadatas else None
+        documents, ids, metadatas = self.deduplicator.filter(documents, ids, metadatas, exempt)
+        if len(documents) != total:
+            log.info(f"Removed {total - len(documents)} of {total} {doc_type} chunks as near-duplicates. Total: {self.deduplicator.stats()}")
+        return documents, ids, metadatas
+
+    def _new_chunks(self, documents, ids, metadatas):
+        """
+        Remove chunks whose IDs are already in the vectorDB (e.g. from a previous import)
+        """
+        existing = self.database.get_existing_ids(ids)
+        kept = [i for i, chunk_id in enumerate(ids) if chunk_id not in existing]
+        return [documents[i] for i in kept], [ids[i] for i in kept], [metadatas[i] for i in kept]
+
+    def _api_query_chunks(self, content, chunk_size):
+        """
+        Mark the chunks which contain a part of the REST API query information (path, operation, parameters).
+        These chunks are the only copy of this information and are never removed as duplicates.
+        """
+        start = content.find("REST API query information delimited with XML tags")
+        if start == -1:
+            return [True for _ in range(0, len(content), chunk_size)]
+        return [i + chunk_size > start for i in range(0, len(content), chunk_size)]
+
     def _chunk_text(self, text, chunk_size):
         """
         Chunk the text into smaller pieces
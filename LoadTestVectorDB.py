@@ -0,0 +1,115 @@
+"""
+Cisco Sample Code License 1.1
+Author: flopach 2024
+
+Load test: several read-only worker processes query one shared Chroma server while one writer process adds documents.
+The queries are embedded once before the test, so the results measure the Chroma server and not the embedding API.
+
+1. Start the Chroma server:  chroma run --path chromadb/ --port 8001
+2. Import the data once with the writer instance (CHROMA_HOST=localhost chainlit run main.py, type "importdata")
+3. Run the load test:        python LoadTestVectorDB.py --workers 4 --queries 50 --writer-docs 100
+"""
+import argparse
+import logging
+import statistics
+import sys
+import time
+from multiprocessing import Pool, Process
+from TalkToDatabase import VectorDB
+
+log = logging.getLogger("applogger")
+
+QUERIES = [
+    "How do I get an access token?",
+    "List all network devices",
+    "How can I run a command with the command runner?",
+    "Get the health of all clients",
+    "Create a new site with a building and floor",
+    "How do I start a path trace between two hosts?",
+    "Provision a device to a site",
+    "Which API returns the software images?",
+    "How do I subscribe to events?",
+    "Create a global IP pool"
+]
+
+def run_worker(args):
+    """
+    Worker process: open a read-only VectorDB and run the already embedded queries
+
+    Returns:
+        list: duration of each query in seconds
+    """
+    worker_id, host, port, embeddings_function, n_queries, query_embeddings = args
+    database = VectorDB("catcenter_vectors", embeddings_function, host=host, port=port, read_only=True)
+
+    durations = []
+    for i in range(n_queries):
+        index = (worker_id + i) % len(QUERIES)
+        start_time = time.time()
+        database.query_db(QUERIES[index], 10, "apispecs", query_embedding=query_embeddings[index])
+        durations.append(time.time() - start_time)
+    return durations
+
+def run_writer(host, port, embeddings_function, ids, query_embeddings):
+    """
+    Writer process: the single instance adding documents while the workers are querying
+    """
+    database = VectorDB("catcenter_vectors", embeddings_function, host=host, port=port)
+
+    for i in range(0, len(ids), 10):
+        batch = ids[i:i + 10]
+        database.collection_add(
+            documents=[f"Load test document {x}" for x in batch],
+            ids=batch,
+            embeddings=[query_embeddings[n % len(query_embeddings)] for n in range(i, i + len(batch))],
+            metadatas=[{"doc_type": "loadtest"} for _ in batch]
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description="Query one shared Chroma server with several worker processes")
+    parser.add_argument("--host", default="localhost", help="Chroma server host")
+    parser.add_argument("--port", type=int, default=8001, help="Chroma server port")
+    parser.add_argument("--embeddings", default="openai", help='"openai" or "ollama", same as used for the import')
+    parser.add_argument("--workers", type=int, default=4, help="number of worker processes")
+    parser.add_argument("--queries", type=int, default=50, help="number of queries per worker")
+    parser.add_argument("--writer-docs", type=int, default=100, help="documents added by the writer during the test, 0 = no writer")
+    args = parser.parse_args()
+
+    logging.basicConfig()
+    log.setLevel(logging.INFO)
+
+    # embed the queries once, the workers only send the embeddings to the Chroma server
+    database = VectorDB("catcenter_vectors", args.embeddings, host=args.host, port=args.port, read_only=True)
+    query_embeddings = [[float(x) for x in embedding] for embedding in database.embeddings_function(QUERIES)]
+    count_before = database.collection.count()
+
+    writer_ids = [f"loadtest_{int(time.time())}_{i}" for i in range(args.writer_docs)]
+    writer = Process(target=run_writer, args=(args.host, args.port, args.embeddings, writer_ids, query_embeddings))
+
+    start_time = time.time()
+    if writer_ids:
+        writer.start()
+    with Pool(args.workers) as pool:
+        results = pool.map(run_worker, [(w, args.host, args.port, args.embeddings, args.queries, query_embeddings) for w in range(args.workers)])
+    if writer_ids:
+        writer.join()
+    duration = time.time() - start_time
+
+    durations = sorted(d for worker_durations in results for d in worker_durations)
+    log.info(f"{len(durations)} queries with {args.workers} workers in {round(duration, 2)} seconds")
+    log.info(f"Throughput: {round(len(durations) / duration, 2)} queries/second")
+    log.info(f"Latency p50: {round(statistics.median(durations) * 1000, 1)} ms, p95: {round(durations[int(len(durations) * 0.95) - 1] * 1000, 1)} ms")
+
+    if writer_ids:
+        # every document of the writer is stored exactly once
+        count_after = database.collection.count()
+        stored_ids = database.get_existing_ids(writer_ids)
+        database.collection.delete(ids=writer_ids)
+
+        if writer.exitcode != 0 or count_after != count_before + len(writer_ids) or stored_ids != set(writer_ids):
+            log.error(f"Writer check failed: {count_before} documents before, {count_after} after, {len(stored_ids)} of {len(writer_ids)} writer documents stored")
+            sys.exit(1)
+        log.info(f"Writer check passed: {len(writer_ids)} documents added exactly once while querying")
+
+if __name__ == "__main__":
+    main()
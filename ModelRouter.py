@@ -0,0 +1,108 @@
+"""
+Cisco Sample Code License 1.1
+Author: flopach 2024
+"""
+import re
+import logging
+log = logging.getLogger("applogger")
+
+# explicit requests for source code. Words like "example", "function" or "code" alone ("status code") are not enough.
+CODE_PATTERN = r"\b(python|script|snippet|requests library|(write|generate|create|show|give)( me)?( an?| some| the)?( example| sample)? code)\b"
+
+class ModelRouter:
+    def __init__(self, rules=None, code_pattern=CODE_PATTERN):
+        """
+        Create new router which selects the LLM model per request
+
+        Args:
+            rules (list): list of rules, the first matching rule defines the model.
+                          If no rule matches, the default model of the LLM class is used.
+                          Each rule is a dict with "model" and optional conditions:
+                          "task" --> "chat" or "extend_api_description"
+                          "min_prompt_tokens" / "max_prompt_tokens" --> estimated tokens of the prompt
+                          "min_confidence" / "max_confidence" --> retrieval confidence between 0 and 1
+                          "wants_code" --> True or False, the question asks for source code
+                          Example: {"task": "chat", "wants_code": True, "max_confidence": 0.5, "model": "gpt-4o"}
+            code_pattern (str): regular expression (case-insensitive) which defines that the question asks for code
+        """
+        self.rules = rules or []
+        self.code_pattern = re.compile(code_pattern, re.IGNORECASE)
+        self.latencies = {}
+
+    def estimate_tokens(self, text):
+        """
+        Estimate the number of tokens (approx. 4 characters per token)
+        """
+        return len(text) // 4
+
+    def retrieval_confidence(self, distances):
+        """
+        Convert the vectorDB distances into a confidence between 0 and 1 (1 = exact match)
+
+        Args:
+            distances (list): distances returned by the vectorDB query
+        """
+        flat = [d for result in distances for d in result]
+        if not flat:
+            return None
+        return round(1 / (1 + min(flat)), 3)
+
+    def _matches(self, rule, task, prompt_tokens, confidence, wants_code):
+        """
+        Check if all conditions of the rule are fulfilled
+        """
+        if "task" in rule and rule["task"] != task:
+            return False
+        if "min_prompt_tokens" in rule and prompt_tokens < rule["min_prompt_tokens"]:
+            return False
+        if "max_prompt_tokens" in rule and prompt_tokens > rule["max_prompt_tokens"]:
+            return False
+        if "min_confidence" in rule and (confidence is None or confidence < rule["min_confidence"]):
+            return False
+        if "max_confidence" in rule and (confidence is None or confidence > rule["max_confidence"]):
+            return False
+        if "wants_code" in rule and rule["wants_code"] != wants_code:
+            return False
+        return True
+
+    def select_model(self, task, prompt, question, distances, default_model):
+        """
+        Select the model for a request
+
+        Args:
+            task (str): "chat" or "extend_api_description"
+            prompt (str): prompt (context + question) which is sent to the LLM, without the chat history
+            question (str): user question or API description
+            distances (list): distances returned by the vectorDB queries
+            default_model (str): model if no rule matches
+        """
+        prompt_tokens = self.estimate_tokens(prompt)
+        confidence = self.retrieval_confidence(distances)
+        wants_code = bool(self.code_pattern.search(question))
+
+        model = default_model
+        for rule in self.rules:
+            if self._matches(rule, task, prompt_tokens, confidence, wants_code):
+                model = rule["model"]
+                break
+
+        log.info(f"Routing {task} to {model} (prompt_tokens={prompt_tokens}, confidence={confidence}, wants_code={wants_code})")
+        return model
+
+    def record_latency(self, model, duration):
+        """
+        Save the duration of a completion and log the average latency of the model
+
+        Args:
+            model (str): model which was used
+            duration (float): duration in seconds
+        """
+        self.latencies.setdefault(model, []).append(duration)
+        durations = self.latencies[model]
+        log.info(f"Model {model} took {round(duration, 2)} seconds (average {round(sum(durations) / len(durations), 2)} seconds over {len(durations)} requests)")
+
+    def stats(self):
+        """
+        Return the number of requests and average latency per model
+        """
+        return {model: {"requests": len(d), "avg_latency": round(sum(d) / len(d), 2)} for model, d in self.latencies.items()}
@@ -8,18 +8,29 @@ import logging
 log = logging.getLogger("applogger")
 
 class VectorDB:
-    def __init__(self, collection_name, embeddings_function="openai", database_path="chromadb/"):
+    def __init__(self, collection_name, embeddings_function="openai", database_path="chromadb/", host=None, port=8001, read_only=False):
         """
         Create new VectorDB instance
 
         Args:
             collection_name (str): Name of the collection
             embeddings_function (str): "openai" or "ollama"
-            database_path (str): persistent storage for vectorDB
+            database_path (str): persistent storage for vectorDB (only used without host)
+            host (str): Option to connect to a shared Chroma server:
+                        default --> None (embedded database in database_path, single process only)
+                        "localhost" --> server started with: chroma run --path chromadb/ --port 8001
+            port (int): port of the Chroma server
+            read_only (bool): query-only instance, adding documents is not allowed.
+                              Use it for all workers except the single one importing the data.
         """
+        self.read_only = read_only
 
         # define chromadb client
-        self.chromadb_client = chromadb.PersistentClient(path=database_path)
+        if host is not None:
+            self.chromadb_client = chromadb.HttpClient(host=host, port=port)
+            log.info(f"Connected to Chroma server {host}:{port} (read_only={read_only})")
+        else:
+            self.chromadb_client = chromadb.PersistentClient(path=database_path)
 
         # set embeddings function
         # different for each chosen LLM
@@ -32,9 +43,17 @@ class VectorDB:
             self.embeddings_function = chromadb.utils.embedding_functions.DefaultEmbeddingFunction()
 
         # set collection
-        self.collection = self.chromadb_client.get_or_create_collection(name=collection_name, embedding_function=self.embeddings_function)
-
-    def query_db(self, query_string, n_results, where_clause=None):
+        # read-only workers must not create the collection: only the writer instance does
+        if read_only:
+            try:
+                self.collection = self.chromadb_client.get_collection(name=collection_name, embedding_function=self.embeddings_function)
+            except Exception as e:
+                log.error(f"Collection '{collection_name}' does not exist! Error: {str(e)}")
+                raise ValueError(f"Collection '{collection_name}' does not exist. Start the writer instance and import the data first.") from e
+        else:
+            self.collection = self.chromadb_client.get_or_create_collection(name=collection_name, embedding_function=self.embeddings_function)
+
+    def query_db(self, query_string, n_results, where_clause=None, return_distances=False, query_embedding=None):
         """
         Query the vector DB
 
@@ -46,6 +65,9 @@ class VectorDB:
                                 apidocs --> {"doc_type": "apidocs"}
                                 apispecs --> {"doc_type": "apispecs"}
                                 userguide --> {"doc_type": "userguide"}
+                                or any Chroma where filter, e.g. {"doc_type": {"$ne": "apispecs"}}
+            return_distances (bool): also return the distances of the queried documents
+            query_embedding (list): already embedded query_string, the embeddings function is not called
         """
 
         # define vectorDB search
@@ -58,18 +80,36 @@ class VectorDB:
         elif where_clause == "userguide":
             where_clause = {"doc_type": "userguide"}
 
-        results = self.collection.query(
-            query_texts=[query_string],
-            n_results=n_results,
-            where=where_clause
-        )
+        if query_embedding is not None:
+            results = self.collection.query(
+                query_embeddings=[query_embedding],
+                n_results=n_results,
+                where=where_clause
+            )
+        else:
+            results = self.collection.query(
+                query_texts=[query_string],
+                n_results=n_results,
+                where=where_clause
+            )
 
         # Display queried documents
         log.debug(f'Queried documents: {results["metadatas"]}')
         log.debug(f'Queried distances: {results["distances"]}')
 
+        if return_distances:
+            return results["documents"], results["distances"]
         return results["documents"]
 
+    def get_existing_ids(self, ids):
+        """
+        Return the IDs which are already in the collection
+
+        Args:
+            ids (list): list of IDs
+        """
+        return set(self.collection.get(ids=ids, include=[])["ids"])
+
     def collection_add(self, documents, ids, embeddings, metadatas):
         """
         Add to collection
@@ -80,6 +120,7 @@ class VectorDB:
             embeddings (list): list of embeddings
             metadatas (list): list of metadata
         """
+        self._check_writable()
         try:
             #log.info(f"Adding documents to collection: {documents}")
             #log.info(f"With IDs: {ids}")
@@ -107,6 +148,7 @@ class VectorDB:
             ids (list): list of IDs
             metadatas (list): list of metadata
         """
+        self._check_writable()
         try:
             #log.info(f"Adding documents to collection: {documents}")
             #log.info(f"With IDs: {ids}")
@@ -122,4 +164,12 @@ class VectorDB:
             log.info("Successfully added documents to collection")
         except Exception as e:
             log.error(f"Error adding documents to collection: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+
+    def _check_writable(self):
+        """
+        Only the single writer instance is allowed to add documents
+        """
+        if self.read_only:
+            log.error("Cannot add documents: this VectorDB instance is read-only")
+            raise PermissionError("VectorDB instance is read-only. Import the data with the writer instance.")
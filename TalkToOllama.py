@@ -17,12 +17,14 @@ OLLAMA_URL = os.getenv("OLLAMA_URL")
 OLLAMA_API = os.getenv("OPENAI_API_KEY")
 
 class LLMOllama:
-  def __init__(self, database, model = "llama3.1:latest"):
+  def __init__(self, database, model = "llama3.1:latest", cache=None, router=None):
     self.client = OpenAI(
       base_url=f"{OLLAMA_URL}/v1",
       api_key=OLLAMA_API
     )
     self.database = database
+    self.cache = cache
+    self.router = router
     self.model = model
 
   def extend_api_description(self,query_string,path,operation,parameters):
@@ -36,24 +38,53 @@ class LLMOllama:
         parameters (str): Query parameters
     """
 
+    system_prompt = "You are provided information of a specific REST API query path of the Cisco Catalyst Center. Describe what this query is for in detail. Describe how this query can be used from a user perspective."
+    temperature = 0.8
+    inputs = [self.model, system_prompt, path, operation, parameters, query_string]
+
+    # return cached completion if the same inputs were already sent to the LLM: no vectorDB query needed
+    if self.cache is not None:
+      if self.cache.temperature is not None:
+        temperature = self.cache.temperature
+      cached = self.cache.get_by_inputs(inputs, temperature)
+      if cached is not None:
+        log.debug(f"=== Using cached description for {operation} {path} ===")
+        return cached
+
     # query vector DB for local data
-    context_query = self.database.query_db(query_string,10)
+    # the already extended API specification is excluded: it grows during the import and would change the prompt (and cache key) on every run
+    context_query, distances = self.database.query_db(query_string,10,{"doc_type": {"$ne": "apispecs"}},return_distances=True)
 
     # create promt message with local context data
     message = f'Query path: "{path}"\nREST operation: {operation}\nshort description: {query_string}\n{parameters}\nUse this context delimited with XML tags:\n<context>\n{context_query}\n</context>'
     log.debug(f"=== Extending the description with: ===\n {message}")
 
+    model = self._select_model("extend_api_description", system_prompt + message, query_string, distances)
+
+    # the same prompt may have been cached with other inputs (e.g. by an older version of the cache)
+    if self.cache is not None:
+      cached = self.cache.get(model, system_prompt, message, temperature, inputs)
+      if cached is not None:
+        log.debug(f"=== Using cached description for {operation} {path} ===")
+        return cached
+
     # ask GPT
+    start_time = time.time()
     completion = self.client.chat.completions.create(
-      model=self.model,
-      temperature=0.8,
+      model=model,
+      temperature=temperature,
       messages=[
-        {"role": "system", "content": "You are provided information of a specific REST API query path of the Cisco Catalyst Center. Describe what this query is for in detail. Describe how this query can be used from a user perspective."},
+        {"role": "system", "content": system_prompt},
         {"role": "user", "content": message}
       ]
     )
+    self._record_latency(model, time.time() - start_time)
+
+    response = completion.choices[0].message.content
+    if self.cache is not None:
+      self.cache.set(model, system_prompt, message, temperature, response, tag="extend_api_description", inputs=inputs)
 
-    return completion.choices[0].message.content
+    return response
 
   def ask_llm(self,query_string,n_results_apidocs=10,n_results_apispecs=20):
     """
@@ -69,8 +100,8 @@ class LLMOllama:
     start_time = time.time()
 
     # context queries to vectorDB
-    context_query_apidocs = self.database.query_db(query_string,n_results_apidocs,"apidocs")
-    context_query_apispecs = self.database.query_db(query_string,n_results_apispecs,"apispecs")
+    context_query_apidocs, distances_apidocs = self.database.query_db(query_string,n_results_apidocs,"apidocs",return_distances=True)
+    context_query_apispecs, distances_apispecs = self.database.query_db(query_string,n_results_apispecs,"apispecs",return_distances=True)
     context = f'''Context information delimited with XML tags:\n<context>\n{context_query_apidocs}\n</context>
                   API specification context delimited with XML tags:\n<api-context>\n{context_query_apispecs}\n</api-context>'''
 
@@ -80,8 +111,11 @@ class LLMOllama:
 
     log.debug(message)
 
+    model = self._select_model("chat", message, query_string, distances_apidocs + distances_apispecs)
+
+    completion_start_time = time.time()
     completion = self.client.chat.completions.create(
-      model=self.model,
+      model=model,
       temperature=0.8,
       messages=[
         { "role": "system",
@@ -99,10 +133,26 @@ class LLMOllama:
         {"role": "user", "content": message}
       ]
     )
+    self._record_latency(model, time.time() - completion_start_time)
 
     # Calculate the total duration
     duration = round(time.time() - start_time, 2)
     exec_duration = f"The query '{query_string}' took **{duration} seconds** to execute."
     log.info(exec_duration)
 
-    return completion.choices[0].message.content+"\n\n"+exec_duration
\ No newline at end of file
+    return completion.choices[0].message.content+"\n\n"+exec_duration
+
+  def _select_model(self, task, prompt, question, distances):
+    """
+    Select the model with the router (if defined)
+    """
+    if self.router is None:
+      return self.model
+    return self.router.select_model(task, prompt, question, distances, self.model)
+
+  def _record_latency(self, model, duration):
+    """
+    Record the latency of a completion in the router (if defined)
+    """
+    if self.router is not None:
+      self.router.record_latency(model, duration)
@@ -6,9 +6,11 @@ from TalkToOpenAI import LLMOpenAI
 from TalkToOllama import LLMOllama
 from TalkToDatabase import VectorDB
 from ImportData import DataHandler
+from CompletionCache import CompletionCache
+from Deduplicator import ChunkDeduplicator
+from ModelRouter import ModelRouter, CODE_PATTERN
 import logging
 import chainlit as cl
-import json
 import os
 
 # ======================
@@ -24,8 +26,43 @@ setting_chosen_LLM = "openai"
 # False = Use the already generated JSON file (generated with GPT-3.5-turbo)
 setting_full_import = False
 
-# File to store chat history
-CHAT_HISTORY_FILE = "chat_history.json"
+# Cache the generated API descriptions on disk. A re-run of the full import with unchanged inputs reuses them.
+# None = use the temperature of the LLM class (0.8), 0 = pin the temperature for reproducible regeneration
+setting_cache_path = "completion_cache.db"
+setting_cache_temperature = None
+
+# Route requests to different models. The first matching rule defines the model.
+# If no rule matches, the model defined below is used (see ModelRouter.py for all conditions).
+setting_routing_rules = {
+  "openai": [
+    # code questions with weak context from the vectorDB and very long prompts go to the stronger model
+    {"task": "chat", "wants_code": True, "max_confidence": 0.5, "model": "gpt-4o"},
+    {"task": "chat", "min_prompt_tokens": 12000, "model": "gpt-4o"}
+  ],
+  "ollama": [
+    # example: {"task": "extend_api_description", "model": "llama3.2:3b"}
+  ]
+}
+
+# Regular expression (case-insensitive) for questions which ask for source code, used by the "wants_code" rules
+# default: "python", "script", "snippet", "requests library" or "write/generate/show ... code"
+setting_routing_code_pattern = CODE_PATTERN
+
+# Shared vector database for several workers (processes or hosts)
+# None = embedded database in "chromadb/" (single process only)
+# "localhost" = Chroma server started with: chroma run --path chromadb/ --port 8001
+setting_chroma_host = os.getenv("CHROMA_HOST")
+setting_chroma_port = int(os.getenv("CHROMA_PORT", "8001"))
+
+# Only one worker imports data, all other workers are started with VECTORDB_READ_ONLY=true
+setting_read_only = os.getenv("VECTORDB_READ_ONLY", "false").lower() == "true"
+
+# Remove near-duplicate chunks (estimated Jaccard similarity above this value, compared per doc_type) before embedding them.
+# Navigation, header and footer subtrees repeated on the scraped API doc pages are removed as well.
+# In practice (5-word shingles, 512-character chunks) 0.9 only removes chunks which are identical apart from case and
+# whitespace: changing a single word in a chunk of ~80 words already lowers the similarity to ~0.86.
+# None = disable the deduplication and the boilerplate removal
+setting_dedup_threshold = 0.9
 
 # ======================
 # Instance creations
@@ -35,43 +72,31 @@ CHAT_HISTORY_FILE = "chat_history.json"
 log = logging.getLogger("applogger")
 logging.getLogger("applogger").setLevel(logging.DEBUG)
 
+# Create completion cache for the generated API descriptions
+cache = CompletionCache(setting_cache_path, temperature=setting_cache_temperature)
+
 if setting_chosen_LLM == "openai":
   # OpenAI: Create instance for Vector DB and LLM
-  database = VectorDB("catcenter_vectors","openai","chromadb/")
-  LLM = LLMOpenAI(database=database, chat_model="gpt-3.5-turbo", embedding_model="text-embedding-ada-002")
+  database = VectorDB("catcenter_vectors","openai","chromadb/", host=setting_chroma_host, port=setting_chroma_port, read_only=setting_read_only)
+  LLM = LLMOpenAI(database=database, chat_model="gpt-3.5-turbo", embedding_model="text-embedding-ada-002", cache=cache, router=ModelRouter(setting_routing_rules["openai"], setting_routing_code_pattern))
 else:
   # Open Source LLM: Create instance for Vector DB and LLM
-  database = VectorDB("catcenter_vectors","ollama","chromadb/")
-  LLM = LLMOllama(database=database, model="llama3.1:latest")
+  database = VectorDB("catcenter_vectors","ollama","chromadb/", host=setting_chroma_host, port=setting_chroma_port, read_only=setting_read_only)
+  LLM = LLMOllama(database=database, model="llama3.1:latest", cache=cache, router=ModelRouter(setting_routing_rules["ollama"], setting_routing_code_pattern))
 
 # Create DataHandler instance to import and embed data from local documents
-datahandler = DataHandler(database, LLM)
+deduplicator = ChunkDeduplicator(threshold=setting_dedup_threshold) if setting_dedup_threshold is not None else None
+datahandler = DataHandler(database, LLM, deduplicator)
 
 # ======================
 # Chainlit functions
 # docs: https://docs.chainlit.io/get-started/overview
 # ======================
 
-# Global variable to store chat history
-chat_history = []
-
-def load_chat_history():
-  global chat_history
-  if os.path.exists(CHAT_HISTORY_FILE):
-    with open(CHAT_HISTORY_FILE, "r") as file:
-      chat_history = json.load(file)
-  else:
-    chat_history = []
-
-def save_chat_history():
-  global chat_history
-  with open(CHAT_HISTORY_FILE, "w") as file:
-    json.dump(chat_history, file)
-
 @cl.on_chat_start
 def on_chat_start():
-  global chat_history
-  load_chat_history()
+  # each chat session has its own history: no shared state between sessions and workers
+  cl.user_session.set("chat_history", [])
   log.info("A new chat session has started!")
 
 @cl.on_message
@@ -83,7 +108,7 @@ async def main(message: cl.Message):
   Args:
      message: The user's message.
   """
-  global chat_history
+  chat_history = cl.user_session.get("chat_history")
 
   # trick for loader: https://docs.chainlit.io/concepts/message
   msg = cl.Message(content="")
@@ -96,7 +121,6 @@ async def main(message: cl.Message):
     # else, send the user_query to the LLM
     chat_history.append({"role": "user", "content": message.content})
     msg.content = await ask_llm(message.content, chat_history)
-    save_chat_history()
 
   await msg.update()
 
@@ -107,7 +131,6 @@ async def ask_llm(query_string, chat_history):
   """
   response = LLM.ask_llm(query_string, chat_history, n_results_apidocs=10, n_results_apispecs=10, n_results_userguide=10)
   chat_history.append({"role": "assistant", "content": response})
-  save_chat_history()
   return response
 
 @cl.step
@@ -115,6 +138,12 @@ async def import_data():
   """
   Chainlit Step function: Importing data to vectorDB
   """
+  if setting_read_only:
+    return "This worker is read-only. Run the import on the worker started without VECTORDB_READ_ONLY=true."
+
+  if deduplicator is not None:
+    deduplicator.reset()
+
   # Import data from API documentation  
   datahandler.scrape_apidocs_catcenter()
 
@@ -127,4 +156,7 @@ async def import_data():
   else:
     datahandler.import_apispecs_from_json()
 
+  if deduplicator is not None:
+    log.info(f"=== Near-duplicate chunks removed during import: {deduplicator.stats()} ===")
+
   return "All data imported!"
\ No newline at end of file
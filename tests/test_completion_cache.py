@@ -0,0 +1,130 @@
+"""
+Cisco Sample Code License 1.1
+Author: flopach 2024
+"""
+import json
+import os
+import sys
+from types import SimpleNamespace
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("openai")
+from TalkToOpenAI import LLMOpenAI
+from CompletionCache import CompletionCache
+
+class FakeDatabase:
+    """
+    Returns all stored documents which match the where clause (only doc_type filters)
+    """
+    def __init__(self):
+        self.documents = [("Authentication uses the X-Auth-Token header.", "apidocs"), ("The user guide explains sites.", "userguide")]
+        self.ids = set()
+        self.query_calls = 0
+        self.add_calls = 0
+
+    def get_existing_ids(self, ids):
+        return self.ids.intersection(ids)
+
+    def collection_add2(self, documents, ids, metadatas):
+        self.add_calls += 1
+        self.ids.update(ids)
+        self.documents += [(d, m["doc_type"]) for d, m in zip(documents, metadatas)]
+
+    def query_db(self, query_string, n_results, where_clause=None, return_distances=False):
+        self.query_calls += 1
+        if where_clause is None:
+            documents = [d for d, _ in self.documents]
+        elif isinstance(where_clause["doc_type"], dict):
+            documents = [d for d, t in self.documents if t != where_clause["doc_type"]["$ne"]]
+        else:
+            documents = [d for d, t in self.documents if t == where_clause["doc_type"]]
+        documents = [documents[:n_results]]
+        if return_distances:
+            return documents, [[0.5] * len(documents[0])]
+        return documents
+
+class FakeCompletions:
+    def __init__(self):
+        self.calls = []
+
+    def create(self, model, temperature, messages):
+        self.calls.append((model, temperature, messages))
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=f"description {len(self.calls)}"))])
+
+OPERATIONS = [
+    ("Get devices.", "/dna/intent/api/v1/network-device", "get", ""),
+    ("Add device.", "/dna/intent/api/v1/network-device", "post", ""),
+    ("Get sites.", "/dna/intent/api/v1/site", "get", "REST API query parameters:\n- name: site name.\n")
+]
+
+def run_import(database, cache, monkeypatch):
+    """
+    Extend all operations and add the result into the database, like import_apispecs_generate_new_data()
+    """
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    llm = LLMOpenAI(database=database, cache=cache)
+    completions = FakeCompletions()
+    llm.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+
+    for query_string, path, operation, parameters in OPERATIONS:
+        description = llm.extend_api_description(query_string, path, operation, parameters)
+        database.documents.append((description, "apispecs"))
+    return completions.calls
+
+def test_unchanged_rerun_uses_cache(tmp_path, monkeypatch):
+    database = FakeDatabase()
+
+    first_calls = run_import(database, CompletionCache(str(tmp_path / "cache.db")), monkeypatch)
+    cache = CompletionCache(str(tmp_path / "cache.db"))
+    second_calls = run_import(database, cache, monkeypatch)
+
+    assert len(first_calls) == len(OPERATIONS)
+    assert second_calls == []
+    assert cache.stats()["hits"] == len(OPERATIONS)
+
+def test_pinned_temperature_is_a_cache_miss(tmp_path, monkeypatch):
+    database = FakeDatabase()
+    run_import(database, CompletionCache(str(tmp_path / "cache.db")), monkeypatch)
+
+    calls = run_import(database, CompletionCache(str(tmp_path / "cache.db"), temperature=0), monkeypatch)
+
+    assert len(calls) == len(OPERATIONS)
+    assert all(temperature == 0 for _, temperature, _ in calls)
+
+def test_cached_rerun_skips_vectordb(tmp_path, monkeypatch):
+    pytest.importorskip("fitz")
+    pytest.importorskip("bs4")
+    pytest.importorskip("PyPDF2")
+    from ImportData import DataHandler
+
+    # small API specification with the same structure as data/GA-2-3-7-swagger-v1.annotated.json
+    spec = {"paths": {}}
+    for query_string, path, operation, _ in OPERATIONS:
+        spec["paths"].setdefault(path, {})[operation] = {
+            "summary": query_string, "description": "", "operationId": f"{operation}{len(spec['paths'])}",
+            "tags": ["Devices"], "parameters": [{"name": "id", "description": "device id", "in": "query"}]
+        }
+    monkeypatch.chdir(tmp_path)
+    os.mkdir("data")
+    with open("spec.json", "w") as f:
+        json.dump(spec, f)
+
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    database = FakeDatabase()
+
+    def run():
+        llm = LLMOpenAI(database=database, cache=CompletionCache(str(tmp_path / "cache.db")))
+        completions = FakeCompletions()
+        llm.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+        DataHandler(database, llm).import_apispecs_generate_new_data("spec.json")
+        return completions.calls
+
+    assert len(run()) == len(OPERATIONS)
+    query_calls, add_calls = database.query_calls, database.add_calls
+    assert query_calls == len(OPERATIONS) and add_calls == len(OPERATIONS)
+
+    assert run() == []
+    assert database.query_calls == query_calls
+    assert database.add_calls == add_calls
@@ -0,0 +1,53 @@
+"""
+Cisco Sample Code License 1.1
+Author: flopach 2024
+"""
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Deduplicator import ChunkDeduplicator, strip_boilerplate
+
+CHUNK = "The network device API returns the list of all devices managed by the Catalyst Center including their management IP address and software version."
+OTHER = "Use the site API to create areas, buildings and floors. Devices can be assigned to a site when they are provisioned by the Catalyst Center."
+
+def test_identical_chunks_in_same_group_are_removed():
+    deduplicator = ChunkDeduplicator()
+    documents, ids, _ = deduplicator.filter([CHUNK, OTHER, CHUNK], ["a", "b", "c"], [{"doc_type": "apidocs"}] * 3)
+
+    assert documents == [CHUNK, OTHER]
+    assert ids == ["a", "b"]
+    assert deduplicator.stats()["apidocs"] == {"seen": 3, "removed": 1, "removed_ratio": 0.333}
+
+def test_chunks_of_different_groups_are_not_compared():
+    deduplicator = ChunkDeduplicator()
+    documents, _, _ = deduplicator.filter([CHUNK, CHUNK], ["a", "b"], [{"doc_type": "apidocs"}, {"doc_type": "userguide"}])
+
+    assert documents == [CHUNK, CHUNK]
+    assert set(deduplicator.stats()) == {"apidocs", "userguide"}
+
+def test_exempt_chunks_are_always_kept():
+    deduplicator = ChunkDeduplicator()
+    documents, ids, _ = deduplicator.filter([CHUNK, CHUNK, CHUNK], ["a", "b", "c"], [{"doc_type": "apispecs"}] * 3, exempt=[False, True, False])
+
+    assert ids == ["a", "b"]
+    assert deduplicator.stats()["apispecs"]["removed"] == 1
+
+def test_strip_boilerplate_keeps_code_and_removes_navigation():
+    BeautifulSoup = pytest.importorskip("bs4").BeautifulSoup
+
+    navigation = "<div class='navigation'>" + "".join(f"<a href='/docs/{i}'>Catalyst Center guide {i}</a>" for i in range(5)) + "</div>"
+    code = "<pre>import requests\nheaders = {'X-Auth-Token': token, 'Content-Type': 'application/json'}</pre>"
+    soups = {
+        i: BeautifulSoup(f"<html><body>{navigation}<main><h2>Parameters</h2><p>Content of page {i}</p>{code}</main></body></html>", "html.parser")
+        for i in range(5)
+    }
+
+    strip_boilerplate(soups)
+
+    for soup in soups.values():
+        assert soup.find("div", class_="navigation") is None
+        assert soup.find("pre") is not None
+        assert "Parameters" in soup.get_text()
@@ -0,0 +1,67 @@
+"""
+Cisco Sample Code License 1.1
+Author: flopach 2024
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ModelRouter import ModelRouter
+
+RULES = [
+    {"task": "chat", "wants_code": True, "max_confidence": 0.5, "model": "strong"},
+    {"task": "chat", "min_prompt_tokens": 100, "max_prompt_tokens": 200, "model": "medium"},
+    {"task": "chat", "min_confidence": 0.8, "model": "small"}
+]
+
+def test_first_matching_rule_wins():
+    router = ModelRouter(RULES)
+
+    # matches the first and the second rule
+    assert router.select_model("chat", "x" * 600, "Write python code to list devices", [[1.5]], "default") == "strong"
+
+def test_default_model_if_no_rule_matches():
+    router = ModelRouter(RULES)
+
+    assert router.select_model("extend_api_description", "x" * 600, "Write python code", [[1.5]], "default") == "default"
+    assert router.select_model("chat", "x" * 40, "What is the token endpoint?", [[0.5]], "default") == "default"
+
+def test_prompt_token_bounds():
+    router = ModelRouter(RULES)
+
+    assert router.select_model("chat", "x" * 399, "question", [[0.5]], "default") == "default"
+    assert router.select_model("chat", "x" * 400, "question", [[0.5]], "default") == "medium"
+    assert router.select_model("chat", "x" * 803, "question", [[0.5]], "default") == "medium"
+    assert router.select_model("chat", "x" * 804, "question", [[0.5]], "default") == "default"
+
+def test_confidence_bounds():
+    router = ModelRouter(RULES)
+
+    assert router.retrieval_confidence([[1.0, 3.0], [0.25]]) == 0.8
+    assert router.select_model("chat", "x", "question", [[0.25]], "default") == "small"
+    assert router.select_model("chat", "x", "question", [[0.3]], "default") == "default"
+    assert router.select_model("chat", "x", "python script please", [[1.0]], "default") == "strong"
+    assert router.select_model("chat", "x", "python script please", [[0.9]], "default") == "default"
+
+def test_no_distances_never_match_confidence_rules():
+    router = ModelRouter(RULES)
+
+    assert router.retrieval_confidence([]) is None
+    assert router.retrieval_confidence([[]]) is None
+    assert router.select_model("chat", "x", "Write python code", [[]], "default") == "default"
+
+def test_code_pattern():
+    router = ModelRouter([{"wants_code": True, "model": "strong"}])
+
+    for question in ["Show me code to get all sites", "Give me a python example", "Write a script for the SWIM API", "Use the requests library"]:
+        assert router.select_model("chat", "x", question, [], "default") == "strong"
+    for question in ["Which status code does the API return?", "What is the error code 401?", "Give me an example of a site hierarchy", "What does this function do?"]:
+        assert router.select_model("chat", "x", question, [], "default") == "default"
+
+def test_stats():
+    router = ModelRouter()
+    router.record_latency("small", 1.0)
+    router.record_latency("small", 2.0)
+
+    assert router.stats() == {"small": {"requests": 2, "avg_latency": 1.5}}
@@ -0,0 +1,64 @@
+"""
+Cisco Sample Code License 1.1
+Author: flopach 2024
+"""
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+chromadb = pytest.importorskip("chromadb")
+from TalkToDatabase import VectorDB
+
+class FakeCollection:
+    def __init__(self):
+        self.added = []
+
+    def add(self, **kwargs):
+        self.added.append(kwargs)
+
+class FakeClient:
+    """
+    Chroma client with an in-memory list of collections
+    """
+    def __init__(self, collections):
+        self.collections = collections
+
+    def get_collection(self, name, embedding_function=None):
+        if name not in self.collections:
+            raise ValueError(f"Collection {name} does not exist.")
+        return self.collections[name]
+
+    def get_or_create_collection(self, name, embedding_function=None):
+        return self.collections.setdefault(name, FakeCollection())
+
+@pytest.fixture
+def collections(monkeypatch):
+    collections = {}
+    monkeypatch.setattr(chromadb, "HttpClient", lambda host, port: FakeClient(collections))
+    monkeypatch.setattr(chromadb.utils.embedding_functions, "DefaultEmbeddingFunction", lambda: None)
+    return collections
+
+def test_read_only_worker_does_not_create_collection(collections):
+    with pytest.raises(ValueError, match="writer instance"):
+        VectorDB("catcenter_vectors", "ollama", host="localhost", read_only=True)
+
+    assert collections == {}
+
+def test_read_only_worker_cannot_add(collections):
+    VectorDB("catcenter_vectors", "ollama", host="localhost")
+    database = VectorDB("catcenter_vectors", "ollama", host="localhost", read_only=True)
+
+    with pytest.raises(PermissionError):
+        database.collection_add2(documents=["doc"], ids=["id_0"], metadatas=[{"doc_type": "apidocs"}])
+    with pytest.raises(PermissionError):
+        database.collection_add(documents=["doc"], ids=["id_0"], embeddings=[[0.1]], metadatas=[{"doc_type": "apidocs"}])
+
+    assert collections["catcenter_vectors"].added == []
+
+def test_writer_adds_documents(collections):
+    database = VectorDB("catcenter_vectors", "ollama", host="localhost")
+    database.collection_add2(documents=["doc"], ids=["id_0"], metadatas=[{"doc_type": "apidocs"}])
+
+    assert collections["catcenter_vectors"].added[0]["ids"] == ["id_0"]